@@ -1,48 +1,162 @@
 """AI logic module for generating embeddings using sentence-transformers."""
 
+import hashlib
+import os
+from collections import OrderedDict
+
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from typing import Union
+from typing import List, Union
+
+# SimSIMD provides hand-vectorized AVX-512/NEON similarity kernels; fall
+# back to NumPy when it isn't installed
+try:
+    import simsimd
+    _HAS_SIMSIMD = True
+except ImportError:
+    _HAS_SIMSIMD = False
+
+# Numba-compiled parallel kernel as a second optional fast path; only
+# worth the compile/dispatch cost for larger archives
+try:
+    from ai_logic_numba import batch_dot as _numba_batch_dot
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+# Below this many notes, BLAS dispatch is cheaper than the numba kernel
+_NUMBA_MIN_NOTES = 1024
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Quantized ONNX export shipped with the model repository. Int8 weights cut
+# matmul memory traffic 4x and use VNNI int8 dot products on modern CPUs.
+ONNX_QUANTIZED_FILE = 'onnx/model_qint8_avx512_vnni.onnx'
 
 # Load the model once at module level for efficiency
 _model = None
 
 
+def _load_model() -> SentenceTransformer:
+    """Load the sentence transformer with the configured backend.
+
+    The backend is selected via the ILA_BACKEND environment variable:
+    'onnx' (default, with int8 dynamic quantization), 'openvino', or
+    'torch'. If the requested backend is unavailable (e.g. the onnx
+    extras are not installed), falls back to the default PyTorch backend.
+
+    Returns:
+        SentenceTransformer model instance.
+    """
+    backend = os.environ.get('ILA_BACKEND', 'onnx').lower()
+
+    if backend in ('onnx', 'openvino'):
+        model_kwargs = {}
+        if backend == 'onnx':
+            # Prefer the pre-quantized int8 export for CPU inference
+            model_kwargs['file_name'] = ONNX_QUANTIZED_FILE
+        try:
+            return SentenceTransformer(MODEL_NAME, backend=backend, model_kwargs=model_kwargs)
+        except Exception:
+            # Quantized file may be missing from the cache; retry with the
+            # backend's default export before giving up on it entirely.
+            try:
+                return SentenceTransformer(MODEL_NAME, backend=backend)
+            except Exception:
+                pass
+
+    # Default (or fallback): vanilla PyTorch backend
+    return SentenceTransformer(MODEL_NAME)
+
+
 def get_model() -> SentenceTransformer:
     """Get or initialize the sentence transformer model.
-    
+
     Returns:
         SentenceTransformer model instance.
     """
     global _model
     if _model is None:
-        _model = SentenceTransformer('all-MiniLM-L6-v2')
+        _model = _load_model()
+        # Warm up the encoder so the first real call runs with populated
+        # caches/compiled kernels instead of paying that cost mid-command
+        _model.encode([""], convert_to_numpy=True)
     return _model
 
 
+# Bounded LRU of embeddings keyed on a digest of the text, so repeated
+# queries (and duplicate chunks) skip the transformer forward pass. Keys
+# are 16-byte BLAKE2 digests rather than the texts themselves, keeping
+# the cache small even for long inputs.
+_embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_EMBEDDING_CACHE_MAX = 1024
+
+
 def text_to_vector(text: str) -> np.ndarray:
     """Convert a string into a vector embedding.
-    
+
     Args:
         text: The input text string to convert.
-        
+
     Returns:
         Numpy array representing the embedding vector.
     """
+    key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    cached = _embedding_cache.get(key)
+    if cached is not None:
+        _embedding_cache.move_to_end(key)
+        return cached
+
     model = get_model()
     embedding = model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+
+    _embedding_cache[key] = embedding
+    if len(_embedding_cache) > _EMBEDDING_CACHE_MAX:
+        _embedding_cache.popitem(last=False)
     return embedding
 
 
+def texts_to_vectors(texts: List[str]) -> np.ndarray:
+    """Convert a list of strings into embedding vectors in one batched call.
+
+    Encoding all texts at once amortizes transformer dispatch overhead and
+    lets the model run large batched matmuls, which is much faster than
+    encoding one text at a time.
+
+    Args:
+        texts: The input text strings to convert.
+
+    Returns:
+        2D numpy array of shape (len(texts), 384) with one embedding per text.
+    """
+    model = get_model()
+    embeddings = model.encode(
+        texts,
+        batch_size=32,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return embeddings
+
+
 def vector_to_bytes(vector: np.ndarray) -> bytes:
     """Convert a numpy array to bytes for database storage.
-    
+
+    Vectors are normalized to unit length before serialization, so every
+    stored embedding satisfies the invariant that lets search use plain
+    dot products as cosine similarity.
+
     Args:
         vector: The numpy array to convert.
-        
+
     Returns:
-        Bytes representation of the vector.
+        Bytes representation of the unit-norm float32 vector.
     """
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm != 0:
+        vector = vector / norm
     return vector.tobytes()
 
 
@@ -75,65 +189,103 @@ def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
     """
     if vec1 is None or vec2 is None:
         return 0.0
-    
-    # Ensure vectors are 1D and have the same shape
-    vec1 = vec1.flatten()
-    vec2 = vec2.flatten()
-    
+
+    # Flatten so (1, 384)-shaped inputs work, and make the result
+    # contiguous so vdot/dot dispatch straight to BLAS
+    vec1 = np.ascontiguousarray(vec1).ravel()
+    vec2 = np.ascontiguousarray(vec2).ravel()
+
     if vec1.shape != vec2.shape:
         return 0.0
-    
-    # Calculate dot product
-    dot_product = np.dot(vec1, vec2)
-    
-    # Calculate norms
-    norm1 = np.linalg.norm(vec1)
-    norm2 = np.linalg.norm(vec2)
-    
+
+    # vdot-based squared norms under a single sqrt avoid two np.linalg.norm
+    # calls (each with its own dispatch overhead and sqrt)
+    denom = np.sqrt(np.vdot(vec1, vec1) * np.vdot(vec2, vec2))
+
     # Avoid division by zero
-    if norm1 == 0 or norm2 == 0:
+    if denom == 0:
         return 0.0
-    
-    # Cosine similarity = dot product / (norm1 * norm2)
-    similarity = dot_product / (norm1 * norm2)
-    
+
+    similarity = np.dot(vec1, vec2) / denom
+
     # Clamp to [-1, 1] to handle floating point errors
     return float(np.clip(similarity, -1.0, 1.0))
 
 
-def cosine_similarity_batch(query_vec: np.ndarray, note_vectors: np.ndarray) -> np.ndarray:
-    """Calculate cosine similarity between a query vector and multiple note vectors efficiently.
-    
-    This uses vectorized operations for much better performance than calculating one-by-one.
-    
+def dot_scores(query_vec: np.ndarray, note_vectors: np.ndarray) -> np.ndarray:
+    """Calculate cosine similarity between a query vector and multiple note vectors.
+
+    Stored note vectors are unit-norm (text_to_vector encodes with
+    normalize_embeddings=True and the vector store renormalizes legacy
+    rows), so cosine similarity reduces to a single matrix-vector product
+    against the normalized query — no per-query renormalization of the
+    note matrix.
+
     Args:
         query_vec: Query embedding vector (1D array, shape: (384,)).
-        note_vectors: Array of note embedding vectors (2D array, shape: (n_notes, 384)).
-        
+        note_vectors: Note embedding matrix (2D array, shape: (n_notes, 384)).
+            Float rows must be unit-norm; int8 rows may carry arbitrary
+            per-vector quantization scales.
+
     Returns:
         Array of similarity scores (1D array, shape: (n_notes,)).
     """
+    # Resolve degenerate inputs before touching any array math
     if query_vec is None or note_vectors is None or len(note_vectors) == 0:
-        return np.array([])
-    
-    # Ensure query vector is 1D
+        return np.array([], dtype=np.float32)
+
+    # Normalize the query vector once
     query_vec = query_vec.flatten()
-    
-    # Normalize query vector once
     query_norm = np.linalg.norm(query_vec)
     if query_norm == 0:
         return np.zeros(len(note_vectors))
-    query_vec_norm = query_vec / query_norm
-    
-    # Normalize all note vectors at once (vectorized)
-    note_norms = np.linalg.norm(note_vectors, axis=1, keepdims=True)
-    # Avoid division by zero
-    note_norms = np.where(note_norms == 0, 1, note_norms)
-    note_vectors_norm = note_vectors / note_norms
-    
-    # Calculate dot products for all notes at once (vectorized)
-    similarities = np.dot(note_vectors_norm, query_vec_norm)
-    
+    query_vec_norm = np.ascontiguousarray(query_vec / query_norm, dtype=np.float32)
+
+    if note_vectors.dtype == np.int8:
+        # Quantized matrices are scored without dequantization: cosine is
+        # invariant to the per-vector quantization scales, so they never
+        # need to be read back.
+        if _HAS_SIMSIMD:
+            # Quantize the query symmetrically and use the native int8
+            # cosine kernel, which reads a quarter of the float32 bytes
+            q_scale = np.max(np.abs(query_vec_norm)) / np.float32(127.0)
+            query_i8 = np.round(query_vec_norm / q_scale).astype(np.int8)
+            note_vectors = np.ascontiguousarray(note_vectors)
+            distances = simsimd.cdist(query_i8[None, :], note_vectors, metric="cos")
+            similarities = 1.0 - np.asarray(distances)[0]
+        else:
+            # NumPy fallback: upcast and divide by row norms, since int8
+            # rows are not unit-norm
+            floats = note_vectors.astype(np.float32)
+            norms = np.linalg.norm(floats, axis=1)
+            norms[norms == 0] = 1.0
+            similarities = (
+                np.einsum("nd,d->n", floats, query_vec_norm, optimize=True) / norms
+            )
+        return np.clip(similarities, -1.0, 1.0)
+
+    if _HAS_SIMSIMD:
+        # One fused pass over memory computing dot products and norms.
+        # float16 matrices are scored natively instead of being upcast.
+        note_vectors = np.ascontiguousarray(note_vectors)
+        if note_vectors.dtype not in (np.float32, np.float16):
+            note_vectors = note_vectors.astype(np.float32)
+        query = query_vec_norm.astype(note_vectors.dtype, copy=False)
+        distances = simsimd.cdist(query[None, :], note_vectors, metric="cos")
+        similarities = 1.0 - np.asarray(distances)[0]
+    elif (
+        _HAS_NUMBA
+        and len(note_vectors) >= _NUMBA_MIN_NOTES
+        and note_vectors.dtype == np.float32
+    ):
+        contiguous = np.ascontiguousarray(note_vectors, dtype=np.float32)
+        similarities = np.empty(len(contiguous), dtype=np.float32)
+        _numba_batch_dot(contiguous, query_vec_norm, similarities)
+    else:
+        # einsum scores straight out of the (possibly memory-mapped) matrix
+        # without materializing any intermediate array
+        similarities = np.einsum("nd,d->n", note_vectors, query_vec_norm, optimize=True)
+
     # Clamp to [-1, 1] to handle floating point errors
     return np.clip(similarities, -1.0, 1.0)
 
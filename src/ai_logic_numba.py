@@ -0,0 +1,30 @@
+"""Numba-accelerated similarity kernels.
+
+Importing this module requires numba; ai_logic guards the import and
+falls back to NumPy when it is not installed. The kernel is compiled on
+first use and cached on disk by numba for subsequent runs.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+# all-MiniLM-L6-v2 always produces 384-dim vectors. Baking the trip count
+# in as a compile-time constant lets LLVM fully unroll and vectorize the
+# inner reduction instead of emitting a generic counted loop.
+EMBEDDING_DIM = 384
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def batch_dot(note_vectors: np.ndarray, query_vec: np.ndarray, out: np.ndarray) -> None:
+    """Compute dot products of every note vector with the query in parallel.
+
+    Args:
+        note_vectors: Contiguous float32 matrix of shape (n_notes, 384).
+        query_vec: Contiguous float32 query vector of shape (384,).
+        out: Preallocated float32 output array of shape (n_notes,).
+    """
+    for i in prange(note_vectors.shape[0]):
+        s = np.float32(0.0)
+        for d in range(EMBEDDING_DIM):
+            s += note_vectors[i, d] * query_vec[d]
+        out[i] = s
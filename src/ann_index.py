@@ -0,0 +1,131 @@
+"""Approximate nearest-neighbor index for sublinear semantic search.
+
+Uses hnswlib (optional dependency) to keep an inner-product HNSW graph of
+all note embeddings persisted at `ila.hnsw`. Because stored vectors are
+unit-norm, inner product equals cosine similarity. The index follows the
+same lazy model as the vector store: it is rebuilt whenever its id set no
+longer matches the notes being searched, and small archives skip it
+entirely since a brute-force scan is faster than graph traversal there.
+"""
+
+import numpy as np
+from pathlib import Path
+from typing import Optional, Tuple
+
+try:
+    import hnswlib
+    _HAS_HNSWLIB = True
+except ImportError:
+    _HAS_HNSWLIB = False
+
+INDEX_FILE = Path("ila.hnsw")
+
+# The model 'all-MiniLM-L6-v2' produces 384-dimensional vectors
+EMBEDDING_DIM = 384
+
+# Below this many notes, a brute-force scan beats graph traversal
+MIN_NOTES_FOR_ANN = 1000
+
+# HNSW construction/search parameters: M controls graph degree,
+# ef_construction build-time beam width, ef query-time beam width
+_M = 16
+_EF_CONSTRUCTION = 200
+_EF_SEARCH = 64
+
+
+def invalidate() -> None:
+    """Drop the persisted index so the next query rebuilds it."""
+    if INDEX_FILE.exists():
+        INDEX_FILE.unlink()
+
+
+def _build(note_ids: np.ndarray, note_matrix: np.ndarray) -> "hnswlib.Index":
+    """Build, persist, and return an index over the given embeddings."""
+    index = hnswlib.Index(space="ip", dim=EMBEDDING_DIM)
+    index.init_index(
+        max_elements=max(2 * len(note_ids), 1024),
+        ef_construction=_EF_CONSTRUCTION,
+        M=_M,
+    )
+    # Row-normalize so 'ip' distances equal cosine even for int8-quantized
+    # matrices, whose rows carry arbitrary per-vector scales
+    matrix = np.asarray(note_matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    index.add_items(matrix / norms, note_ids)
+    index.set_ef(_EF_SEARCH)
+    index.save_index(str(INDEX_FILE))
+    return index
+
+
+def _load_or_build(note_ids: np.ndarray, note_matrix: np.ndarray) -> "hnswlib.Index":
+    """Load the persisted index, rebuilding it if missing or out of sync."""
+    if INDEX_FILE.exists():
+        try:
+            index = hnswlib.Index(space="ip", dim=EMBEDDING_DIM)
+            index.load_index(str(INDEX_FILE), max_elements=max(2 * len(note_ids), 1024))
+            index.set_ef(_EF_SEARCH)
+            if set(index.get_ids_list()) == set(int(i) for i in note_ids):
+                return index
+        except RuntimeError:
+            # Corrupt or incompatible index file; fall through to rebuild
+            pass
+    return _build(note_ids, note_matrix)
+
+
+def append(note_id: int, vector: np.ndarray) -> None:
+    """Add one embedding to the persisted index, if one exists.
+
+    Args:
+        note_id: The database id of the note the vector belongs to.
+        vector: The note's unit-norm embedding as a 1D float32 array.
+    """
+    if not _HAS_HNSWLIB or not INDEX_FILE.exists():
+        # No index yet; it will be built in full on the next query
+        return
+
+    try:
+        index = hnswlib.Index(space="ip", dim=EMBEDDING_DIM)
+        index.load_index(str(INDEX_FILE))
+        if index.get_current_count() >= index.get_max_elements():
+            index.resize_index(2 * index.get_max_elements())
+        index.add_items(
+            np.asarray(vector, dtype=np.float32).reshape(1, -1), [int(note_id)]
+        )
+        index.save_index(str(INDEX_FILE))
+    except RuntimeError:
+        # Leave a broken index behind and it poisons every query; drop it
+        invalidate()
+
+
+def query(
+    note_ids: np.ndarray, note_matrix: np.ndarray, query_vec: np.ndarray, k: int = 3
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Find the top-k most similar notes via the HNSW index.
+
+    Args:
+        note_ids: int64 array of note ids, aligned with note_matrix rows.
+        note_matrix: Embedding matrix of shape (N, 384); float rows must
+            be unit-norm, int8 rows are normalized during the build.
+        query_vec: The query embedding as a 1D array (any norm).
+        k: Number of results to return.
+
+    Returns:
+        Tuple of (ids, similarities) sorted by descending similarity, or
+        None when the index is unavailable or the archive is small enough
+        that the caller should brute-force instead.
+    """
+    if not _HAS_HNSWLIB or len(note_ids) < MIN_NOTES_FOR_ANN:
+        return None
+
+    query_vec = np.asarray(query_vec, dtype=np.float32).flatten()
+    norm = np.linalg.norm(query_vec)
+    if norm == 0:
+        return None
+    query_vec = query_vec / norm
+
+    index = _load_or_build(note_ids, note_matrix)
+    labels, distances = index.knn_query(query_vec, k=min(k, len(note_ids)))
+
+    # For unit vectors in 'ip' space, distance = 1 - dot = 1 - cosine
+    return labels[0].astype(np.int64), 1.0 - distances[0]
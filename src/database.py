@@ -1,29 +1,82 @@
 """Database module for managing notes in SQLite database."""
 
+import atexit
 import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import Iterator, List, Dict, Optional, Any, Tuple
 
 DB_FILE = Path("ila.db")
 
+# One connection per thread, reused across operations so SQLite's page
+# cache stays warm instead of being rebuilt on every call
+_tls = threading.local()
+_open_connections: List[sqlite3.Connection] = []
+_open_connections_lock = threading.Lock()
+
 
 def get_connection() -> sqlite3.Connection:
-    """Create and return a database connection.
-    
+    """Get the calling thread's database connection, creating it on first use.
+
     Returns:
         SQLite database connection.
     """
+    conn = getattr(_tls, "conn", None)
+    if conn is not None:
+        return conn
+
     conn = sqlite3.connect(DB_FILE)
     conn.row_factory = sqlite3.Row  # Enable column access by name
+    # WAL avoids an fsync per commit and lets readers run alongside writers;
+    # synchronous=NORMAL is safe in WAL mode and further cuts flush cost.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Larger page cache (64 MB), in-memory temp tables, and mmap'd reads
+    # (256 MB) to avoid copying large embedding BLOBs through user space
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+
+    _tls.conn = conn
+    with _open_connections_lock:
+        _open_connections.append(conn)
     return conn
 
 
+def close_all() -> None:
+    """Close every connection opened by this process."""
+    with _open_connections_lock:
+        for conn in _open_connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _open_connections.clear()
+    _tls.conn = None
+
+
+atexit.register(close_all)
+
+
+# Schema setup only needs to run once per process; every data-access
+# function used to re-run the DDL, doubling connection churn per command.
+_initialized = False
+
+
 def initialize_database() -> None:
-    """Initialize the database and create notes table if it doesn't exist."""
+    """Initialize the database and create notes table if it doesn't exist.
+
+    Only does real work on the first call per process; subsequent calls
+    return immediately.
+    """
+    global _initialized
+    if _initialized:
+        return
+
     conn = get_connection()
     cursor = conn.cursor()
-    
+
     # Create notes table with parameterized query (though DDL is safe)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS notes (
@@ -34,58 +87,72 @@ def initialize_database() -> None:
             source_file TEXT
         )
     """)
-    
-    # Add embedding column to existing tables if it doesn't exist
-    try:
+
+    # Migrate tables created before the embedding/source_file columns existed.
+    # Probing table_info once avoids the always-raising ALTER-and-catch dance.
+    cursor.execute("PRAGMA table_info(notes)")
+    existing_columns = {row["name"] for row in cursor.fetchall()}
+    if "embedding" not in existing_columns:
         cursor.execute("ALTER TABLE notes ADD COLUMN embedding BLOB")
-    except sqlite3.OperationalError:
-        # Column already exists, ignore
-        pass
-    
-    # Add source_file column to existing tables if it doesn't exist
-    try:
+    if "source_file" not in existing_columns:
         cursor.execute("ALTER TABLE notes ADD COLUMN source_file TEXT")
-    except sqlite3.OperationalError:
-        # Column already exists, ignore
-        pass
-    
+
+    # Partial index covering the embedding IS NOT NULL filter used by the
+    # search path
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notes_embedding_nonnull
+        ON notes(id) WHERE embedding IS NOT NULL
+    """)
+
     conn.commit()
-    conn.close()
+    _initialized = True
 
 
-def add_note(content: str, embedding: Optional[bytes] = None, source_file: Optional[str] = None) -> None:
+def add_note(content: str, embedding: Optional[bytes] = None, source_file: Optional[str] = None) -> int:
     """Add a new note to the database.
-    
+
     Args:
         content: The note content to save.
         embedding: The embedding vector as binary blob (optional).
         source_file: The source file name if the note came from a file (optional).
+
+    Returns:
+        The id of the newly inserted note.
     """
+    initialize_database()
     conn = get_connection()
     cursor = conn.cursor()
-    
-    # Quick check if table exists, initialize if not
-    try:
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='notes'")
-        if cursor.fetchone() is None:
-            # Table doesn't exist, initialize it
-            initialize_database()
-            # Reconnect after initialization
-            conn.close()
-            conn = get_connection()
-            cursor = conn.cursor()
-    except sqlite3.Error:
-        # If check fails, try to initialize
-        conn.close()
-        initialize_database()
-        conn = get_connection()
-        cursor = conn.cursor()
-    
+
     # Use parameterized query to prevent SQL injection
     cursor.execute("INSERT INTO notes (content, embedding, source_file) VALUES (?, ?, ?)", (content, embedding, source_file))
-    
+
+    note_id = cursor.lastrowid
+    conn.commit()
+    return note_id
+
+
+def add_notes_bulk(rows: List[Tuple[str, Optional[bytes], Optional[str]]]) -> None:
+    """Add many notes in a single transaction.
+
+    Using one executemany + one commit keeps the whole batch to a single
+    journal flush instead of one per note.
+
+    Args:
+        rows: List of (content, embedding, source_file) tuples to insert.
+    """
+    if not rows:
+        return
+
+    initialize_database()
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Use parameterized query to prevent SQL injection
+    cursor.executemany(
+        "INSERT INTO notes (content, embedding, source_file) VALUES (?, ?, ?)", rows
+    )
+
     conn.commit()
-    conn.close()
 
 
 def get_all_notes() -> List[Dict[str, Any]]:
@@ -94,26 +161,10 @@ def get_all_notes() -> List[Dict[str, Any]]:
     Returns:
         List of note dictionaries with 'id', 'content', 'created_at', and 'embedding' keys.
     """
+    initialize_database()
     conn = get_connection()
     cursor = conn.cursor()
-    
-    # Quick check if table exists, initialize if not
-    try:
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='notes'")
-        if cursor.fetchone() is None:
-            # Table doesn't exist, initialize it
-            initialize_database()
-            # Reconnect after initialization
-            conn.close()
-            conn = get_connection()
-            cursor = conn.cursor()
-    except sqlite3.Error:
-        # If check fails, try to initialize
-        conn.close()
-        initialize_database()
-        conn = get_connection()
-        cursor = conn.cursor()
-    
+
     # Use parameterized query (though SELECT without user input is safe)
     cursor.execute("SELECT id, content, created_at, embedding, source_file FROM notes ORDER BY id ASC")
     
@@ -129,10 +180,114 @@ def get_all_notes() -> List[Dict[str, Any]]:
         for row in rows
     ]
     
-    conn.close()
     return notes
 
 
+def iter_notes(limit: Optional[int] = None, offset: int = 0) -> Iterator[Dict[str, str]]:
+    """Iterate over notes without materializing the whole table.
+
+    Rows are fetched in batches and yielded one at a time, and the
+    embedding BLOBs are never read — use get_embeddings_only() for those.
+
+    Args:
+        limit: Maximum number of notes to yield (all when None).
+        offset: Number of notes to skip from the start.
+
+    Yields:
+        Note dictionaries with 'id', 'content', and 'created_at' keys.
+    """
+    initialize_database()
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Pagination happens in SQL so skipped rows never reach Python;
+    # SQLite treats LIMIT -1 as unlimited
+    cursor.execute(
+        "SELECT id, content, created_at FROM notes ORDER BY id ASC LIMIT ? OFFSET ?",
+        (limit if limit is not None else -1, offset),
+    )
+
+    while True:
+        rows = cursor.fetchmany(1024)
+        if not rows:
+            return
+        for row in rows:
+            yield {
+                "id": str(row["id"]),
+                "content": row["content"],
+                "created_at": row["created_at"]
+            }
+
+
+def get_embedding_ids() -> List[int]:
+    """Get the ids of all notes that have an embedding.
+
+    Returns:
+        List of note ids in ascending order.
+    """
+    initialize_database()
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT id FROM notes WHERE embedding IS NOT NULL ORDER BY id ASC")
+    return [row["id"] for row in cursor.fetchall()]
+
+
+def get_embeddings_only() -> Tuple[List[int], List[bytes]]:
+    """Get ids and embedding blobs without materializing note content.
+
+    Projecting only the columns the scoring path needs avoids pulling
+    every note's text through Python just to score embeddings.
+
+    Returns:
+        Tuple of (ids, blobs), aligned and in ascending id order.
+    """
+    initialize_database()
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT id, embedding FROM notes WHERE embedding IS NOT NULL ORDER BY id ASC")
+    ids = []
+    blobs = []
+    for row in cursor.fetchall():
+        ids.append(row["id"])
+        blobs.append(row["embedding"])
+    return ids, blobs
+
+
+def get_notes_by_ids(note_ids: List[int]) -> List[Dict[str, str]]:
+    """Get the notes with the given ids.
+
+    Args:
+        note_ids: The ids of the notes to retrieve.
+
+    Returns:
+        List of note dictionaries with 'id', 'content', and 'created_at' keys.
+    """
+    if not note_ids:
+        return []
+
+    initialize_database()
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Use parameterized query to prevent SQL injection
+    placeholders = ",".join("?" * len(note_ids))
+    cursor.execute(
+        f"SELECT id, content, created_at FROM notes WHERE id IN ({placeholders})",
+        note_ids,
+    )
+
+    return [
+        {
+            "id": str(row["id"]),
+            "content": row["content"],
+            "created_at": row["created_at"]
+        }
+        for row in cursor.fetchall()
+    ]
+
+
 def get_note_by_id(note_id: int) -> Optional[Dict[str, str]]:
     """Get a note by its ID.
     
@@ -150,7 +305,6 @@ def get_note_by_id(note_id: int) -> Optional[Dict[str, str]]:
     cursor.execute("SELECT id, content, created_at FROM notes WHERE id = ?", (note_id,))
     
     row = cursor.fetchone()
-    conn.close()
     
     if row:
         return {
@@ -175,5 +329,4 @@ def delete_note(note_id: str) -> None:
     cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,))
     
     conn.commit()
-    conn.close()
 
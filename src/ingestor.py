@@ -1,54 +1,102 @@
 """File ingestion module for processing and storing file contents as notes."""
 
+import codecs
+import itertools
 import mimetypes
+import re
 import sqlite3
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
 
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 
-from database import add_note
-from ai_logic import text_to_vector, vector_to_bytes
+from database import add_notes_bulk
+from ai_logic import texts_to_vectors, vector_to_bytes
+import ann_index
+import vector_store
 
 console = Console()
 
 
+# Word spans are located by offset so chunks can be cut as slices of the
+# original line instead of joining per-word string allocations
+_WORD_RE = re.compile(r"\S+")
+
+
+def iter_chunks(lines: Iterable[str], chunk_size: int = 500) -> Iterator[str]:
+    """Yield chunks of roughly the specified size from an iterable of lines.
+
+    Words are never cut and chunks may span line boundaries. Because this
+    consumes lines lazily, the whole file never has to be in memory.
+    Within a line, words are tracked as character offsets and emitted as a
+    single slice, avoiding a string allocation per word.
+
+    Two semantics differ from the historical split-and-join chunker:
+    boundaries are computed on the exact emitted length, so chunks can
+    fill all the way to chunk_size (the old per-word accounting broke up
+    to two characters earlier), and whitespace runs between words on the
+    same line are preserved verbatim inside a chunk instead of being
+    collapsed to single spaces.
+
+    Args:
+        lines: Iterable of text lines (e.g. an open file handle).
+        chunk_size: Target size for each chunk in characters (default: 500).
+
+    Yields:
+        Text chunks.
+    """
+    # Completed line segments belonging to the chunk under construction,
+    # and their total length including the spaces that will join them
+    pending = []
+    pending_length = 0
+
+    for line in lines:
+        seg_start = None
+        seg_end = None
+
+        for match in _WORD_RE.finditer(line):
+            word_start, word_end = match.span()
+            new_start = seg_start if seg_start is not None else word_start
+            candidate_length = (
+                pending_length + (1 if pending else 0) + (word_end - new_start)
+            )
+
+            # If adding this word would exceed chunk_size, emit the current
+            # chunk and start a new one with this word
+            if candidate_length > chunk_size and (pending or seg_start is not None):
+                if seg_start is not None:
+                    pending.append(line[seg_start:seg_end])
+                yield " ".join(pending)
+                pending = []
+                pending_length = 0
+                seg_start, seg_end = word_start, word_end
+            else:
+                seg_start = new_start
+                seg_end = word_end
+
+        # Carry the line's trailing segment into the pending chunk
+        if seg_start is not None:
+            pending_length += (1 if pending else 0) + (seg_end - seg_start)
+            pending.append(line[seg_start:seg_end])
+
+    # Emit the last chunk if it has content
+    if pending:
+        yield " ".join(pending)
+
+
 def chunk_text(text: str, chunk_size: int = 500) -> List[str]:
     """Split text into chunks of roughly the specified size without cutting words.
-    
+
     Args:
         text: The text to chunk.
         chunk_size: Target size for each chunk in characters (default: 500).
-        
+
     Returns:
         List of text chunks.
     """
     if len(text) <= chunk_size:
         return [text]
-    
-    chunks = []
-    words = text.split()
-    current_chunk = []
-    current_length = 0
-    
-    for word in words:
-        word_length = len(word) + 1  # +1 for the space
-        
-        # If adding this word would exceed chunk_size, save current chunk and start new one
-        if current_length + word_length > chunk_size and current_chunk:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [word]
-            current_length = len(word)
-        else:
-            current_chunk.append(word)
-            current_length += word_length
-    
-    # Add the last chunk if it has content
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-    
-    return chunks
+    return list(iter_chunks([text], chunk_size=chunk_size))
 
 
 def ingest_file(file_path: str) -> int:
@@ -106,64 +154,111 @@ def ingest_file(file_path: str) -> int:
                      f"Only text-based files are allowed.")
         raise ValueError(f"Unsupported file type '{mime_type}' for file: {file_path}")
     
-    # Read the file content with proper error handling
+    # Get the file name for source_file column
+    file_name = path.name
+
+    # Settle the encoding with a streaming validation pass before any chunk
+    # is saved — a mid-file decode error after batches have been committed
+    # would otherwise leave the failed pass's notes in the database and
+    # duplicate them on the retry.
+    try:
+        encoding = _detect_encoding(path)
+    except OSError as e:
+        console.print(f"[red]✗[/red] Error reading file: {e}")
+        raise IOError(f"Error reading file: {e}") from e
+
+    if encoding != 'utf-8':
+        console.print("[yellow]⚠[/yellow] Warning: File is not valid UTF-8; reading as latin-1.")
+
+    # Stream the file instead of loading it all into memory: chunks are
+    # produced lazily and encoded/saved one batch at a time, so peak memory
+    # stays bounded regardless of file size.
     try:
-        text = path.read_text(encoding='utf-8')
-    except UnicodeDecodeError as e:
-        # If UTF-8 fails, it might be a binary file with misleading extension
-        console.print(f"[red]✗[/red] Error: Failed to decode file as UTF-8. "
-                     f"This might be a binary file with a misleading extension.")
-        raise IOError(f"Cannot decode file as text (possibly binary): {file_path}") from e
+        with path.open(encoding=encoding) as f:
+            num_chunks = _ingest_lines(f, file_name)
+    except (sqlite3.Error, IOError):
+        raise
     except Exception as e:
         console.print(f"[red]✗[/red] Error reading file: {e}")
         raise IOError(f"Error reading file: {e}") from e
-    
-    # Get the file name for source_file column
-    file_name = path.name
-    
-    # Split text into chunks
-    chunks = chunk_text(text, chunk_size=500)
-    
-    if not chunks:
+
+    if num_chunks == 0:
         console.print("[yellow]⚠[/yellow] Warning: File appears to be empty.")
-        return 0
-    
-    # Process chunks with progress bar
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console
-    ) as progress:
-        task = progress.add_task(
-            f"[cyan]Processing {len(chunks)} chunk(s) from '{file_name}'...",
-            total=len(chunks)
-        )
-        
-        successful_chunks = 0
-        for chunk in chunks:
+
+    return num_chunks
+
+
+def _detect_encoding(path: Path) -> str:
+    """Pick the text encoding for a file by validating UTF-8 in one pass.
+
+    Streams the raw bytes through an incremental decoder so memory stays
+    bounded, and falls back to latin-1 (which accepts any byte sequence)
+    when the file is not valid UTF-8.
+
+    Args:
+        path: The file to probe.
+
+    Returns:
+        'utf-8' or 'latin-1'.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with path.open('rb') as f:
+        while True:
+            block = f.read(1 << 20)
             try:
-                # Generate embedding for the chunk
-                embedding_vector = text_to_vector(chunk)
-                embedding_bytes = vector_to_bytes(embedding_vector)
-                
-                # Save to database with source_file
-                try:
-                    add_note(chunk, embedding_bytes, source_file=file_name)
-                    successful_chunks += 1
-                except sqlite3.Error as db_error:
-                    console.print(f"\n[red]✗[/red] Database error while saving chunk: {db_error}")
-                    raise
-                except Exception as e:
-                    console.print(f"\n[red]✗[/red] Unexpected error while saving chunk: {e}")
-                    raise sqlite3.Error(f"Error saving to database: {e}") from e
-                
-                progress.update(task, advance=1)
-                
-            except Exception as e:
-                console.print(f"\n[red]✗[/red] Error processing chunk: {e}")
+                if not block:
+                    decoder.decode(b'', final=True)
+                    return 'utf-8'
+                decoder.decode(block)
+            except UnicodeDecodeError:
+                return 'latin-1'
+
+
+# How many chunks to encode and insert per batch while streaming
+_INGEST_BATCH_SIZE = 128
+
+
+def _ingest_lines(lines: Iterable[str], file_name: str) -> int:
+    """Chunk, embed, and save a stream of lines in fixed-size batches.
+
+    Args:
+        lines: Iterable of text lines (e.g. an open file handle).
+        file_name: Name recorded in the source_file column.
+
+    Returns:
+        Number of chunks saved.
+    """
+    chunks_iter = iter_chunks(lines, chunk_size=500)
+    total_chunks = 0
+
+    with console.status(f"[cyan]Ingesting '{file_name}'..."):
+        while True:
+            batch = list(itertools.islice(chunks_iter, _INGEST_BATCH_SIZE))
+            if not batch:
+                break
+
+            embeddings = texts_to_vectors(batch)
+            rows = [
+                (chunk, vector_to_bytes(embedding_vector), file_name)
+                for chunk, embedding_vector in zip(batch, embeddings)
+            ]
+
+            try:
+                add_notes_bulk(rows)
+            except sqlite3.Error as db_error:
+                console.print(f"\n[red]✗[/red] Database error while saving chunks: {db_error}")
                 raise
-    
-    return successful_chunks
+            except Exception as e:
+                console.print(f"\n[red]✗[/red] Unexpected error while saving chunks: {e}")
+                raise sqlite3.Error(f"Error saving to database: {e}") from e
+
+            total_chunks += len(rows)
+
+    if total_chunks:
+        # The cached matrix and ANN index no longer match the table;
+        # both are rebuilt lazily on the next query
+        vector_store.invalidate()
+        ann_index.invalidate()
+
+    return total_chunks
 
@@ -3,19 +3,17 @@
 import sys
 from pathlib import Path
 
-import numpy as np
 import typer
 from rich.console import Console
-from rich.table import Table
 
 # Add src directory to path for imports when running directly
 if __name__ == "__main__":
     sys.path.insert(0, str(Path(__file__).parent))
 
-from database import add_note, get_all_notes, delete_note
-from ai_logic import text_to_vector, vector_to_bytes, bytes_to_vector, cosine_similarity, cosine_similarity_batch
-from ingestor import ingest_file
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+# Heavy imports (ai_logic pulls in sentence-transformers, ingestor pulls in
+# ai_logic, vector_store/ann_index pull in numpy) live inside the commands
+# that need them so that short commands like list don't pay the import cost.
+from database import add_note, add_notes_bulk, get_notes_by_ids, iter_notes, delete_note, initialize_database
 
 app = typer.Typer()
 console = Console()
@@ -30,13 +28,69 @@ def add(
     Args:
         note: The note content to save.
     """
+    import ann_index
+    import vector_store
+    from ai_logic import get_model, text_to_vector, vector_to_bytes
+
+    # Load (and warm up) the model before encoding so the stall is visible
+    with console.status("[cyan]Loading model..."):
+        get_model()
+
     # Generate embedding for the note
     embedding_vector = text_to_vector(note)
     embedding_bytes = vector_to_bytes(embedding_vector)
-    
-    add_note(note, embedding_bytes)
+
+    note_id = add_note(note, embedding_bytes)
+    vector_store.append(note_id, embedding_vector)
+    ann_index.append(note_id, embedding_vector)
     console.print("[green]✓[/green] Note added successfully!")
 
+@app.command()
+def add_batch(
+    file_path: str = typer.Argument(..., help="Path to a text file with one note per line"),
+) -> None:
+    """Add every non-empty line of a file as a separate note.
+
+    All lines are encoded in one batched call and saved in a single
+    transaction, so bulk additions don't pay model dispatch and commit
+    overhead per note.
+
+    Args:
+        file_path: Path to a text file with one note per line.
+    """
+    import ann_index
+    import vector_store
+    from ai_logic import get_model, texts_to_vectors, vector_to_bytes
+
+    path = Path(file_path)
+    if not path.is_file():
+        console.print(f"[red]✗[/red] Error: File not found: {file_path}")
+        raise typer.Exit(code=1)
+
+    lines = [line.strip() for line in path.read_text(encoding="utf-8").splitlines()]
+    lines = [line for line in lines if line]
+
+    if not lines:
+        console.print("[yellow]No notes found in file.[/yellow]")
+        return
+
+    # Load (and warm up) the model before encoding so the stall is visible
+    with console.status("[cyan]Loading model..."):
+        get_model()
+
+    with console.status(f"[cyan]Embedding {len(lines)} note(s)..."):
+        embeddings = texts_to_vectors(lines)
+
+    rows = [
+        (line, vector_to_bytes(embedding_vector), None)
+        for line, embedding_vector in zip(lines, embeddings)
+    ]
+    add_notes_bulk(rows)
+    vector_store.invalidate()
+    ann_index.invalidate()
+    console.print(f"[green]✓[/green] Added {len(rows)} note(s) successfully!")
+
+
 @app.command()
 def delete(
     note_id: str = typer.Argument(..., help="The ID of the note to delete"),
@@ -46,38 +100,76 @@ def delete(
     Args: 
         note_id : ID of the note we want to delete.
     """
+    import ann_index
+    import vector_store
+
     delete_note(note_id)
+    vector_store.invalidate()
+    ann_index.invalidate()
     console.print("[green]✓[/green] Note deleted successfully!")
 
 
 
 @app.command()
-def list_notes() -> None:
-    """List all saved notes in a formatted table."""
-    notes = get_all_notes()
-    
-    if not notes:
-        console.print(
-            "[yellow]No notes found. Use 'add' to create your first note.[/yellow]"
-        )
+def list_notes(
+    limit: int = typer.Option(None, "--limit", "-n", help="Show at most this many notes"),
+    offset: int = typer.Option(0, "--offset", help="Skip this many notes"),
+    plain: bool = typer.Option(False, "--plain", help="Plain tab-separated output without table formatting"),
+) -> None:
+    """List saved notes in a formatted table.
+
+    Args:
+        limit: Maximum number of notes to show (all when omitted).
+        offset: Number of notes to skip from the start.
+        plain: Print plain tab-separated lines, skipping rich's per-cell
+            layout work — much faster for large archives and scriptable.
+    """
+    if plain:
+        # Bulk path: no per-cell style parsing or layout measurement
+        found = False
+        for note in iter_notes(limit=limit, offset=offset):
+            found = True
+            sys.stdout.write(
+                f"{note['id']}\t{note['created_at']}\t{note['content']}\n"
+            )
+        if not found:
+            console.print(
+                "[yellow]No notes found. Use 'add' to create your first note.[/yellow]"
+            )
         return
-    
+
+    from rich.table import Table
+
     table = Table(title="Saved Notes", show_header=True, header_style="bold magenta")
     table.add_column("ID", style="cyan", no_wrap=True)
     table.add_column("Content", style="white")
     table.add_column("Created At", style="dim", no_wrap=True)
-    
-    for note in notes:
+
+    # Stream rows straight from the cursor instead of materializing the
+    # whole table (and its embedding BLOBs) as a list of dicts first
+    found = False
+    for note in iter_notes(limit=limit, offset=offset):
+        found = True
         table.add_row(note["id"], note["content"], note["created_at"])
-    
+
+    if not found:
+        console.print(
+            "[yellow]No notes found. Use 'add' to create your first note.[/yellow]"
+        )
+        return
+
     console.print(table)
 
 
 # Alias 'list' command to 'list_notes' since 'list' is a Python builtin
 @app.command(name="list")
-def list_command() -> None:
-    """List all saved notes. Alias for list_notes."""
-    list_notes()
+def list_command(
+    limit: int = typer.Option(None, "--limit", "-n", help="Show at most this many notes"),
+    offset: int = typer.Option(0, "--offset", help="Skip this many notes"),
+    plain: bool = typer.Option(False, "--plain", help="Plain tab-separated output without table formatting"),
+) -> None:
+    """List saved notes. Alias for list_notes."""
+    list_notes(limit=limit, offset=offset, plain=plain)
 
 
 @app.command()
@@ -89,70 +181,45 @@ def find(
     Args:
         query: The search query string.
     """
-    # Generate embedding for the query
-    with console.status("[cyan]Generating query embedding..."):
-        query_embedding = text_to_vector(query)
-    
-    # Get all notes from database
-    with console.status("[cyan]Loading notes from database..."):
-        notes = get_all_notes()
-    
-    if not notes:
-        console.print("[yellow]No notes found. Use 'add' to create your first note.[/yellow]")
-        return
-    
-    # Filter notes with embeddings and convert to vectors efficiently
-    notes_with_embeddings = []
-    note_embeddings_list = []
-    
-    for note in notes:
-        if note["embedding"] is not None:
-            notes_with_embeddings.append(note)
-            note_embeddings_list.append(note["embedding"])
-    
-    if not notes_with_embeddings:
+    import numpy as np
+    from rich.table import Table
+
+    import ann_index
+    import vector_store
+    from ai_logic import get_model, text_to_vector, dot_scores
+
+    # Load (and warm up) the model before encoding so the stall is visible
+    with console.status("[cyan]Loading model..."):
+        get_model()
+
+    # Encoding one query and loading the cached matrix are both fast;
+    # wrapping them in status spinners cost more than the work itself
+    query_embedding = text_to_vector(query)
+    note_ids, note_matrix = vector_store.load_vectors()
+
+    if len(note_ids) == 0:
         console.print("[yellow]No notes with embeddings found. Add some notes first.[/yellow]")
         return
-    
-    # Convert all embeddings to vectors at once (more efficient)
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console
-    ) as progress:
-        task = progress.add_task(
-            "[cyan]Calculating similarities...",
-            total=len(notes_with_embeddings)
-        )
-        
-        # Convert all byte embeddings to numpy arrays
-        note_vectors = []
-        for i, embedding_bytes in enumerate(note_embeddings_list):
-            note_vectors.append(bytes_to_vector(embedding_bytes))
-            progress.update(task, advance=1)
-        
-        # Convert to numpy array for vectorized operations
-        note_vectors_array = np.array(note_vectors)
-        
-        # Calculate all similarities at once using vectorized operations
-        progress.update(task, description="[cyan]Computing similarities (vectorized)...")
-        similarities = cosine_similarity_batch(query_embedding, note_vectors_array)
-    
-    # Create list of note-similarity pairs
-    note_similarities = [
-        {
-            "note": notes_with_embeddings[i],
-            "similarity": float(similarities[i])
-        }
-        for i in range(len(notes_with_embeddings))
-    ]
-    
-    # Sort by similarity (descending) and get top 3
-    note_similarities.sort(key=lambda x: x["similarity"], reverse=True)
-    top_notes = note_similarities[:3]
-    
+
+    # Try the approximate index first (sublinear for large archives);
+    # fall back to the exact vectorized scan
+    ann_result = ann_index.query(note_ids, note_matrix, query_embedding, k=3)
+    if ann_result is not None:
+        top_ids, top_sims = ann_result
+    else:
+        similarities = dot_scores(query_embedding, note_matrix)
+        # O(N) partial selection of the top 3, then sort only those
+        k = min(3, len(similarities))
+        top = np.argpartition(similarities, -k)[-k:]
+        order = top[np.argsort(-similarities[top])]
+        top_ids = note_ids[order]
+        top_sims = similarities[order]
+
+    # Fetch note metadata for the winners only
+    notes_by_id = {
+        note["id"]: note for note in get_notes_by_ids([int(i) for i in top_ids])
+    }
+
     # Display results using rich
     table = Table(title=f"Top 3 Most Similar Notes for: '{query}'", show_header=True, header_style="bold magenta")
     table.add_column("Rank", style="cyan", no_wrap=True)
@@ -160,18 +227,17 @@ def find(
     table.add_column("Content", style="white")
     table.add_column("Similarity", style="green", no_wrap=True)
     table.add_column("Created At", style="dim", no_wrap=True)
-    
-    for idx, item in enumerate(top_notes, 1):
-        note = item["note"]
-        similarity = item["similarity"]
+
+    for rank, (top_id, top_sim) in enumerate(zip(top_ids, top_sims), 1):
+        note = notes_by_id[str(top_id)]
         table.add_row(
-            str(idx),
+            str(rank),
             note["id"],
             note["content"],
-            f"{similarity:.4f}",
+            f"{top_sim:.4f}",
             note["created_at"]
         )
-    
+
     console.print(table)
 
 
@@ -184,6 +250,8 @@ def ingest(
     Args:
         file_path: Path to the file to ingest.
     """
+    from ingestor import ingest_file
+
     try:
         num_chunks = ingest_file(file_path)
         console.print(f"[green]✓[/green] Successfully ingested file! Created {num_chunks} note(s).")
@@ -199,5 +267,7 @@ def ingest(
 
 
 if __name__ == "__main__":
+    # Run schema setup once up front; data-access functions then skip it
+    initialize_database()
     app()
 
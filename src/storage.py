@@ -1,56 +1,114 @@
-"""Storage module for managing notes in JSON file."""
+"""Storage module for managing notes in an append-only JSONL file."""
 
 import json
 from pathlib import Path
 from typing import List, Dict
 
-NOTES_FILE = Path("notes.json")
+# orjson parses and serializes several times faster than the stdlib json
+# module; fall back to json when it isn't installed
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+NOTES_FILE = Path("notes.jsonl")
+# Pre-JSONL storage file, migrated automatically on first access
+LEGACY_NOTES_FILE = Path("notes.json")
+# Sidecar holding the next note id, so adds never have to read the archive
+META_FILE = Path("notes.meta")
+
+
+def _dumps(obj) -> bytes:
+    """Serialize an object to UTF-8 JSON bytes."""
+    if _HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data: bytes):
+    """Parse UTF-8 JSON bytes."""
+    if _HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _migrate_legacy_file() -> None:
+    """Convert a pre-JSONL notes.json archive to the JSONL layout."""
+    if NOTES_FILE.exists() or not LEGACY_NOTES_FILE.exists():
+        return
+
+    notes = _loads(LEGACY_NOTES_FILE.read_bytes())
+    save_notes(notes)
+    LEGACY_NOTES_FILE.unlink()
 
 
 def _ensure_file_exists() -> None:
-    """Create notes.json file if it doesn't exist."""
+    """Create the notes file if it doesn't exist, migrating legacy data."""
+    _migrate_legacy_file()
     if not NOTES_FILE.exists():
-        with open(NOTES_FILE, "w", encoding="utf-8") as f:
-            json.dump([], f)
+        NOTES_FILE.touch()
+
+
+def _next_id() -> str:
+    """Get the next note id from the sidecar counter and advance it.
+
+    When the sidecar is missing, the counter is seeded from the highest
+    numeric id in the archive.
+
+    Returns:
+        The next note id as a string.
+    """
+    if META_FILE.exists():
+        next_id = int(META_FILE.read_text())
+    else:
+        numeric_ids = [int(n["id"]) for n in load_notes() if str(n["id"]).isdigit()]
+        next_id = max(numeric_ids, default=0) + 1
+
+    META_FILE.write_text(str(next_id + 1))
+    return str(next_id)
 
 
 def load_notes() -> List[Dict[str, str]]:
-    """Load all notes from notes.json file.
-    
+    """Load all notes from the JSONL file.
+
     Returns:
         List of note dictionaries with 'id' and 'content' keys.
     """
     _ensure_file_exists()
-    with open(NOTES_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(NOTES_FILE, "rb") as f:
+        return [_loads(line) for line in f if line.strip()]
 
 
 def save_notes(notes: List[Dict[str, str]]) -> None:
-    """Save notes to notes.json file.
-    
+    """Rewrite the full archive (used for deletes and migration).
+
     Args:
         notes: List of note dictionaries to save.
     """
-    _ensure_file_exists()
-    with open(NOTES_FILE, "w", encoding="utf-8") as f:
-        json.dump(notes, f, indent=2, ensure_ascii=False)
+    with open(NOTES_FILE, "wb") as f:
+        for note in notes:
+            f.write(_dumps(note) + b"\n")
 
 
 def add_note(content: str) -> None:
     """Add a new note to storage.
-    
+
+    Appends a single line instead of rewriting the whole archive, so the
+    cost of an add no longer grows with the number of notes.
+
     Args:
         content: The note content to save.
     """
-    notes = load_notes()
-    note_id = str(len(notes) + 1)
-    new_note = {"id": note_id, "content": content}
-    notes.append(new_note)
-    save_notes(notes)
+    _ensure_file_exists()
+    new_note = {"id": _next_id(), "content": content}
+    with open(NOTES_FILE, "ab") as f:
+        f.write(_dumps(new_note) + b"\n")
+
 
 def delete_note(note_id: str) -> None:
     """Delete a note from storage.
-    
+
     Args:
         note_id: The ID of the note to delete.
     """
@@ -59,13 +117,10 @@ def delete_note(note_id: str) -> None:
     save_notes(notes)
 
 
-
 def get_all_notes() -> List[Dict[str, str]]:
     """Get all notes from storage.
-    
+
     Returns:
         List of all note dictionaries.
     """
     return load_notes()
-
-
@@ -0,0 +1,199 @@
+"""Vector store module for caching embeddings as one contiguous matrix.
+
+SQLite remains the source of truth for note content and embeddings, but
+scoring wants a single contiguous (N, 384) float32 matrix rather than N
+small BLOBs decoded one by one. This module maintains a sidecar pair of
+files — `ila.vecs.f32` (the raw float32 matrix) and `ila.vecs.ids` (the
+int64 note id for each row) — that is appended to on single adds and
+rebuilt from the database whenever it goes stale (e.g. after deletes).
+At query time the matrix is memory-mapped, so setup cost is O(1)
+regardless of archive size.
+"""
+
+import os
+
+import numpy as np
+from pathlib import Path
+from typing import Tuple
+
+from database import get_embedding_ids, get_embeddings_only
+
+# Storage dtype for the cached matrix, selected via ILA_VEC_DTYPE:
+# 'float32' (default, lossless), 'float16' (2x smaller, scored natively
+# by simsimd), or 'int8' (symmetric per-vector quantization, 4x smaller).
+# int8 rows are served quantized and scored as-is — per-vector scales
+# cancel out of cosine similarity — so scans also read 4x fewer bytes.
+VEC_DTYPE = os.environ.get("ILA_VEC_DTYPE", "float32").lower()
+if VEC_DTYPE not in ("float32", "float16", "int8"):
+    VEC_DTYPE = "float32"
+
+_VEC_SUFFIXES = {"float32": "f32", "float16": "f16", "int8": "i8"}
+
+VECTORS_FILE = Path(f"ila.vecs.{_VEC_SUFFIXES[VEC_DTYPE]}")
+IDS_FILE = Path("ila.vecs.ids")
+# Per-row float32 dequantization scales, used only for int8 storage
+SCALES_FILE = Path("ila.vecs.scale")
+
+_ALL_CACHE_FILES = [
+    Path("ila.vecs.f32"),
+    Path("ila.vecs.f16"),
+    Path("ila.vecs.i8"),
+    SCALES_FILE,
+    IDS_FILE,
+]
+
+# The model 'all-MiniLM-L6-v2' produces 384-dimensional vectors
+EMBEDDING_DIM = 384
+
+
+def _quantize_i8(vector: np.ndarray) -> Tuple[np.ndarray, np.float32]:
+    """Quantize a float32 vector to int8 with a symmetric per-vector scale.
+
+    Args:
+        vector: The float32 vector to quantize.
+
+    Returns:
+        Tuple of (int8 vector, float32 scale) such that
+        vector ~= int8_vector * scale.
+    """
+    scale = np.float32(np.max(np.abs(vector)) / 127.0)
+    if scale == 0:
+        scale = np.float32(1.0)
+    quantized = np.round(vector / scale).astype(np.int8)
+    return quantized, scale
+
+
+def invalidate() -> None:
+    """Drop the sidecar files so the next load rebuilds from the database."""
+    for path in _ALL_CACHE_FILES:
+        if path.exists():
+            path.unlink()
+
+
+def _write_row(vec_f, vector: np.ndarray, scales_f=None) -> None:
+    """Write one embedding row in the configured storage dtype."""
+    vector = np.ascontiguousarray(vector, dtype=np.float32)
+    if VEC_DTYPE == "int8":
+        quantized, scale = _quantize_i8(vector)
+        vec_f.write(quantized.tobytes())
+        if scales_f is not None:
+            scales_f.write(scale.tobytes())
+    elif VEC_DTYPE == "float16":
+        vec_f.write(vector.astype(np.float16).tobytes())
+    else:
+        vec_f.write(vector.tobytes())
+
+
+def append(note_id: int, vector: np.ndarray) -> None:
+    """Append one embedding row to the sidecar files.
+
+    Args:
+        note_id: The database id of the note the vector belongs to.
+        vector: The note's embedding as a 1D float32 array.
+    """
+    if not VECTORS_FILE.exists() or not IDS_FILE.exists():
+        # No cache yet; it will be built in full on the next load
+        return
+
+    with open(VECTORS_FILE, "ab") as vec_f:
+        if VEC_DTYPE == "int8":
+            with open(SCALES_FILE, "ab") as scales_f:
+                _write_row(vec_f, vector, scales_f)
+        else:
+            _write_row(vec_f, vector)
+    with open(IDS_FILE, "ab") as f:
+        f.write(np.int64(note_id).tobytes())
+
+
+def _rebuild() -> None:
+    """Rebuild the sidecar files from the notes table.
+
+    Rows are renormalized to unit length on the way in, so vectors stored
+    by older versions without normalize_embeddings=True still satisfy the
+    unit-norm invariant that dot_scores relies on.
+    """
+    ids, blobs = get_embeddings_only()
+
+    if not ids:
+        # Write empty files so the cache still matches the database
+        VECTORS_FILE.write_bytes(b"")
+        IDS_FILE.write_bytes(b"")
+        if VEC_DTYPE == "int8":
+            SCALES_FILE.write_bytes(b"")
+        return
+
+    # Decode every embedding with one frombuffer over the concatenated
+    # blobs instead of a small allocation and copy per row
+    matrix = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+
+    # Renormalizing (which also gives us a writable copy) keeps the
+    # unit-norm invariant for rows written by older versions
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix = (matrix / norms).astype(np.float32)
+
+    np.array(ids, dtype=np.int64).tofile(IDS_FILE)
+    if VEC_DTYPE == "int8":
+        scales = (np.max(np.abs(matrix), axis=1) / 127.0).astype(np.float32)
+        scales[scales == 0] = 1.0
+        np.round(matrix / scales[:, None]).astype(np.int8).tofile(VECTORS_FILE)
+        scales.tofile(SCALES_FILE)
+    elif VEC_DTYPE == "float16":
+        matrix.astype(np.float16).tofile(VECTORS_FILE)
+    else:
+        matrix.tofile(VECTORS_FILE)
+
+
+def _cached_ids() -> np.ndarray:
+    """Read the id column of the sidecar cache (empty array if absent)."""
+    if not IDS_FILE.exists() or not VECTORS_FILE.exists():
+        return np.array([], dtype=np.int64)
+    return np.fromfile(IDS_FILE, dtype=np.int64)
+
+
+def _db_ids() -> np.ndarray:
+    """Read the ids of all notes with embeddings from the database."""
+    return np.array(get_embedding_ids(), dtype=np.int64)
+
+
+def load_vectors() -> Tuple[np.ndarray, np.ndarray]:
+    """Get the (ids, matrix) pair for all notes with embeddings.
+
+    Rebuilds the sidecar cache if it is missing or out of sync with the
+    database, then memory-maps the matrix read-only so no copy is made.
+
+    Returns:
+        Tuple of (int64 id array of shape (N,), matrix of shape (N, 384)
+        in the configured storage dtype). int8 matrices are returned
+        still quantized — cosine similarity is invariant to the
+        per-vector scales, so dot_scores and the ANN index handle them
+        without dequantization. Both arrays are empty when no notes have
+        embeddings.
+    """
+    ids = _cached_ids()
+    expected = _db_ids()
+
+    if ids.shape != expected.shape or not np.array_equal(ids, expected):
+        _rebuild()
+        ids = expected
+
+    if len(ids) == 0:
+        return ids, np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+    if VEC_DTYPE == "int8":
+        # Served quantized: scoring reads a quarter of the bytes a float32
+        # matrix would, and the per-row scales drop out of cosine anyway
+        matrix = np.memmap(VECTORS_FILE, dtype=np.int8, mode="r").reshape(
+            -1, EMBEDDING_DIM
+        )
+    elif VEC_DTYPE == "float16":
+        # Kept in half precision: simsimd scores float16 natively, and the
+        # NumPy fallback upcasts on the fly
+        matrix = np.memmap(VECTORS_FILE, dtype=np.float16, mode="r").reshape(
+            -1, EMBEDDING_DIM
+        )
+    else:
+        matrix = np.memmap(VECTORS_FILE, dtype=np.float32, mode="r").reshape(
+            -1, EMBEDDING_DIM
+        )
+    return ids, matrix